@@ -5,9 +5,13 @@ non-trivial code smells that can't be fixed with simple rule-based approaches.
 """
 
 import ast
+import hashlib
 import json
 import logging
 import os
+import re
+import shelve
+import threading
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 from pathlib import Path
@@ -15,6 +19,7 @@ from openai import OpenAI
 import javalang
 from javalang.tree import MethodDeclaration, ClassDeclaration
 
+from .config import LLM_CACHE_DIR
 from .java_ast import JavaASTAnalyzer
 from .java_dependency_tracker import JavaDependencyTracker as DependencyTracker
 
@@ -22,6 +27,48 @@ from .java_dependency_tracker import JavaDependencyTracker as DependencyTracker
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# First fenced ```java block: fences on their own lines, content captured
+# without its final newline (empty blocks leave the group unset)
+_JAVA_CODE_FENCE_RE = re.compile(
+    r'^[ \t]*```java[ \t\r]*\n(?:(.*?)\n)??[ \t]*```[ \t\r]*$',
+    re.MULTILINE | re.DOTALL
+)
+
+# LLM responses keyed by a hash of the request, kept in memory for the run
+# and in a shelve under LLM_CACHE_DIR across runs
+_response_cache: Dict[str, str] = {}
+_response_cache_lock = threading.Lock()
+
+def _response_key(prompt: str, max_tokens: int) -> str:
+    """Hash the inputs that determine an LLM response."""
+    return hashlib.blake2b(f"{max_tokens}\0{prompt}".encode('utf-8')).hexdigest()
+
+def _cached_response(key: str) -> Optional[str]:
+    """Look a response up in memory, then on disk."""
+    with _response_cache_lock:
+        if key in _response_cache:
+            return _response_cache[key]
+        try:
+            with shelve.open(os.path.join(LLM_CACHE_DIR, 'llm_responses')) as db:
+                response = db.get(key)
+        except Exception as e:
+            logger.debug(f"Could not read LLM response cache: {str(e)}")
+            return None
+        if response is not None:
+            _response_cache[key] = response
+        return response
+
+def _store_response(key: str, response: str) -> None:
+    """Remember a response in memory and on disk."""
+    with _response_cache_lock:
+        _response_cache[key] = response
+        try:
+            os.makedirs(LLM_CACHE_DIR, exist_ok=True)
+            with shelve.open(os.path.join(LLM_CACHE_DIR, 'llm_responses')) as db:
+                db[key] = response
+        except Exception as e:
+            logger.warning(f"Could not write LLM response cache: {str(e)}")
+
 @dataclass
 class CodeComplexityMetrics:
     """Stores complexity metrics for a code unit."""
@@ -54,10 +101,15 @@ class ComplexIssueFixer:
         self.ast_analyzer = None
         self.dependency_tracker = DependencyTracker(project_root=project_root or os.getcwd())
         
-        # Initialize OpenAI client if API key is available
-        self.openai_client = None
-        if self.openai_api_key:
-            self.openai_client = OpenAI(api_key=self.openai_api_key)
+        # Created on first use, so syntax checks and analysis never build an HTTP client
+        self._openai_client: Optional[OpenAI] = None
+    
+    @property
+    def openai_client(self) -> Optional[OpenAI]:
+        """OpenAI client, or None when no API key is available."""
+        if self._openai_client is None and self.openai_api_key:
+            self._openai_client = OpenAI(api_key=self.openai_api_key)
+        return self._openai_client
     
     def analyze_complexity(self, code: str, file_path: str) -> Dict[str, Any]:
         """Analyze code complexity using AST and dependency analysis."""
@@ -66,6 +118,13 @@ class ComplexIssueFixer:
             self.ast_analyzer = JavaASTAnalyzer(source_code=code, file_path=file_path)
             self.ast_analyzer.analyze()
             
+            # Method declarations by start line, to compute complexity from their subtrees
+            method_nodes = {}
+            if hasattr(self.ast_analyzer.tree, 'filter'):
+                for _, node in self.ast_analyzer.tree.filter(MethodDeclaration):
+                    if node.position:
+                        method_nodes[node.position.line] = node
+            
             # Get method-level complexity metrics
             methods = []
             for class_name, java_class in self.ast_analyzer.classes.items():
@@ -73,8 +132,11 @@ class ComplexIssueFixer:
                     method_metrics = CodeComplexityMetrics()
                     method_metrics.line_count = method.end_line - method.start_line + 1
                     # Calculate cyclomatic complexity
-                    method_metrics.cyclomatic_complexity = 1  # Start with 1 for the method entry
-                    # Add more complexity analysis as needed
+                    method_node = method_nodes.get(method.start_line)
+                    if method_node is not None:
+                        method_metrics.cyclomatic_complexity = self._calculate_cyclomatic_complexity(method_node)
+                    else:
+                        method_metrics.cyclomatic_complexity = 1  # Start with 1 for the method entry
                     
                     methods.append({
                         'name': f"{class_name}.{method_name}",
@@ -232,7 +294,8 @@ REFACTORED CODE:
         deps_str = "\n".join(f"- {k}: {v}" for k, v in deps.items())
         
         return prompt.format(
-            rule=issue.get('rule', 'Unknown'),
+            # A combined request for several issues lists all of their rules
+            rule=', '.join(issue['rules']) if issue.get('rules') else issue.get('rule', 'Unknown'),
             message=issue.get('message', 'No message provided'),
             file_path=issue.get('file_path', 'Unknown'),
             metrics=metrics_str,
@@ -258,6 +321,12 @@ REFACTORED CODE:
         if not self.openai_client:
             logger.warning("OpenAI client not initialized. Skipping LLM analysis.")
             return None
+        
+        # Identical prompts recur across runs and duplicated code; skip the round trip
+        key = _response_key(prompt, max_tokens)
+        cached = _cached_response(key)
+        if cached is not None:
+            return cached
             
         try:
             response = self.openai_client.chat.completions.create(
@@ -269,29 +338,19 @@ REFACTORED CODE:
                 max_tokens=max_tokens,
                 temperature=0.2
             )
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
+            if content is not None:
+                _store_response(key, content)
+            return content
         except Exception as e:
             logger.error(f"Error getting LLM response: {str(e)}")
             return None
     
     def extract_code_from_response(self, response: str) -> str:
         """Extract the refactored code from the LLM response."""
-        # Look for code blocks in the response
-        code_blocks = []
-        in_code_block = False
-        current_block = []
-        
-        for line in response.split('\n'):
-            if line.strip() == '```java':
-                in_code_block = True
-                current_block = []
-            elif line.strip() == '```' and in_code_block:
-                in_code_block = False
-                code_blocks.append('\n'.join(current_block))
-            elif in_code_block:
-                current_block.append(line)
-        
-        return code_blocks[0] if code_blocks else ""
+        # Only the first ```java block is used
+        match = _JAVA_CODE_FENCE_RE.search(response)
+        return (match.group(1) or "") if match else ""
     
     def validate_fix(self, original_code: str, fixed_code: str, test_runner) -> bool:
         """Validate that the fix doesn't break functionality."""
@@ -11,3 +11,15 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
 
 # Max fixes per PR (batch size)
 MAX_FIXES_PER_PR = 10
+
+# Max parsed Java files kept in memory per fixer (LRU)
+AST_CACHE_SIZE = int(os.getenv("AST_CACHE_SIZE", "128"))
+
+# Files patched concurrently by the LLM fallback (network-bound, so threads)
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "8"))
+
+# Directory for caches shared across runs (fetched issues, LLM responses)
+CACHE_DIR = os.getenv("SONAR_FIX_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "sonar-fix-agent"))
+
+# On-disk cache of LLM responses shared across runs
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", CACHE_DIR)
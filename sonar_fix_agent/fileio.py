@@ -0,0 +1,14 @@
+import mmap
+import os
+
+# Files larger than this are read through mmap
+_MMAP_THRESHOLD = 64 * 1024
+
+def read_text(path: str) -> str:
+    """Read a whole UTF-8 file, decoding large files straight from a memory map."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size > _MMAP_THRESHOLD:
+            # Decode from the mapping itself, without an intermediate bytes copy
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return str(mm, 'utf-8')
+        return f.read().decode('utf-8')
@@ -0,0 +1,22 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .config import SONAR_TOKEN
+
+# One pooled, keep-alive session shared by every Sonar API call, so paginated
+# fetches and follow-up requests reuse the same TLS connection
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504)),
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+SESSION.auth = (SONAR_TOKEN, "") if SONAR_TOKEN else None
+SESSION.headers["Accept"] = "application/json"
+
+def close_session() -> None:
+    """Release the pooled connections."""
+    SESSION.close()
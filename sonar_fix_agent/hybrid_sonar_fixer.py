@@ -7,9 +7,10 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass, field
 import os
-import openai
+from openai import OpenAI
 
 from .java_ast import JavaASTAnalyzer
+from .fileio import read_text
 from .java_semantic_analyzer import SemanticAnalyzer
 
 @dataclass
@@ -29,8 +30,8 @@ class HybridSonarFixer:
         self.ast_cache: Dict[str, JavaASTAnalyzer] = {}
         self.semantic_cache: Dict[str, SemanticAnalyzer] = {}
         
-        if self.openai_api_key:
-            openai.api_key = self.openai_api_key
+        # One client per fixer, so every LLM call reuses its pooled HTTP connections
+        self.openai_client = OpenAI(api_key=self.openai_api_key) if self.openai_api_key else None
     
     def fix_issues(self, issues: List[SonarIssue]) -> Dict[str, Any]:
         """Fix a list of SonarQube issues."""
@@ -72,7 +73,7 @@ class HybridSonarFixer:
             return semantic_fix
             
         # Fall back to LLM if available
-        if self.openai_api_key:
+        if self.openai_client:
             llm_fix = self._try_llm_fix(issue, ast_analyzer, semantic_analyzer)
             if llm_fix.get("success"):
                 return llm_fix
@@ -88,8 +89,8 @@ class HybridSonarFixer:
     def _get_ast_analyzer(self, file_path: Path) -> JavaASTAnalyzer:
         """Get or create an AST analyzer for the file."""
         if str(file_path) not in self.ast_cache:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                self.ast_cache[str(file_path)] = JavaASTAnalyzer(f.read(), str(file_path))
+            # Large files are decoded straight from a memory map
+            self.ast_cache[str(file_path)] = JavaASTAnalyzer(read_text(str(file_path)), str(file_path))
         return self.ast_cache[str(file_path)]
     
     def _get_semantic_analyzer(self, file_path: Path, 
@@ -120,7 +121,7 @@ class HybridSonarFixer:
             context = self._get_llm_context(issue, ast_analyzer, semantic_analyzer)
             
             # Call LLM
-            response = openai.ChatCompletion.create(
+            response = self.openai_client.chat.completions.create(
                 model="gpt-4",
                 messages=[{"role": "system", "content": "You are a Java expert fixing SonarQube issues."},
                          {"role": "user", "content": self._build_llm_prompt(issue, context)}],
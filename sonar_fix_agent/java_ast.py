@@ -5,6 +5,7 @@ This module provides AST-based analysis for Java code to enable complex Sonar is
 """
 import os
 import re
+import bisect
 import javalang
 import ast
 import os
@@ -13,6 +14,8 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from collections import defaultdict
 
+# Separator tokens that open, close or end a method body
+_BLOCK_SEPARATORS = frozenset({'{', '}', ';'})
 
 @dataclass
 class VariableInfo:
@@ -66,6 +69,7 @@ class JavaMethod:
     end_line: int
     variables: Dict[str, VariableInfo] = field(default_factory=dict)
     method_calls: List[MethodCallInfo] = field(default_factory=list)
+    local_var_defs: Dict[str, int] = field(default_factory=dict)  # local name -> declaration line
     
     def get_variable(self, name: str) -> Optional[VariableInfo]:
         """Get variable by name, checking parameters first."""
@@ -126,6 +130,13 @@ class JavaASTAnalyzer:
         self._type_resolver: Dict[str, str] = {}  # simple_name -> full_name
         self._method_calls: List[MethodCallInfo] = []
         self._imported_star: bool = False  # Track if there's a wildcard import
+        # Sorted start lines of every method, filled in by analyze()
+        self.sorted_method_lines: List[int] = []
+        self._methods_by_line: Dict[int, JavaMethod] = {}
+        # Method start line -> line of its closing brace, built lazily
+        self._method_end_lines: Optional[Dict[int, int]] = None
+        # Identifier name -> character offsets in source_code, built lazily
+        self._identifier_offsets: Optional[Dict[str, List[int]]] = None
         
     def analyze(self) -> None:
         """
@@ -168,6 +179,8 @@ class JavaASTAnalyzer:
                     except Exception as e:
                         print(f"[AST] Warning: Error processing class {class_name}: {str(e)}")
                         continue
+            
+            self._index_method_lines()
                         
         except javalang.parser.JavaSyntaxError as e:
             print(f"[AST] Syntax error in {self.file_path or 'source'}: {e}")
@@ -177,6 +190,97 @@ class JavaASTAnalyzer:
             print(f"[AST] Error analyzing {self.file_path or 'source'}: {str(e)}")
             self.tree = type('SimpleTree', (), {'types': []})()
     
+    def _index_method_lines(self) -> None:
+        """Build the sorted method start-line index used for enclosing-method lookups."""
+        self._methods_by_line = {
+            method.start_line: method
+            for java_class in self.classes.values()
+            for method in java_class.methods.values()
+            if getattr(method, 'start_line', 0) > 0
+        }
+        self.sorted_method_lines = sorted(self._methods_by_line)
+    
+    def _get_method_end_lines(self) -> Dict[int, int]:
+        """
+        Map each method start line to the line that ends the method.
+        
+        JavaMethod.end_line only records where the declaration starts, so the
+        end is found by matching brace tokens from the start line (a bodiless
+        method ends at its ``;``). The lexer skips braces in comments and literals.
+        """
+        if self._method_end_lines is None:
+            ends: Dict[int, int] = {}
+            try:
+                tokens = [
+                    (token.value, token.position.line)
+                    for token in javalang.tokenizer.tokenize(self.source_code)
+                    if isinstance(token, javalang.tokenizer.Separator) and token.value in _BLOCK_SEPARATORS
+                ]
+            except javalang.tokenizer.LexerError as e:
+                print(f"[AST] Could not tokenize {self.file_path or 'source'}: {e}")
+                tokens = []
+            token_lines = [token_line for _, token_line in tokens]
+            
+            for start in self.sorted_method_lines:
+                depth = 0
+                for value, token_line in tokens[bisect.bisect_left(token_lines, start):]:
+                    if value == '{':
+                        depth += 1
+                    elif value == '}':
+                        depth -= 1
+                        if depth <= 0:
+                            if depth == 0:
+                                ends[start] = token_line
+                            break
+                    elif depth == 0:
+                        ends[start] = token_line
+                        break
+            self._method_end_lines = ends
+        
+        return self._method_end_lines
+    
+    def get_method_start_line(self, line: int) -> Optional[int]:
+        """Return the start line of the method enclosing ``line`` (1-based), if any."""
+        idx = bisect.bisect_right(self.sorted_method_lines, line) - 1
+        if idx < 0:
+            return None
+        start = self.sorted_method_lines[idx]
+        # The nearest method starting above line may already have ended
+        end = self._get_method_end_lines().get(start)
+        return start if end is not None and line <= end else None
+    
+    def get_local_var_def_line(self, line: int, name: str) -> Optional[int]:
+        """Return the declaration line of local variable ``name`` in the method enclosing ``line``."""
+        start = self.get_method_start_line(line)
+        if start is None:
+            return None
+        return getattr(self._methods_by_line[start], 'local_var_defs', {}).get(name)
+    
+    def get_identifier_offsets(self, name: str) -> List[int]:
+        """
+        Return the character offsets of every identifier token named ``name``.
+        
+        Offsets come from the lexer, so matches inside comments and string
+        literals are excluded. The index is built on first use.
+        """
+        if self._identifier_offsets is None:
+            line_starts = [0]
+            for line in self.lines:
+                line_starts.append(line_starts[-1] + len(line) + 1)
+            
+            offsets: Dict[str, List[int]] = defaultdict(list)
+            try:
+                for token in javalang.tokenizer.tokenize(self.source_code):
+                    if isinstance(token, javalang.tokenizer.Identifier) and token.position:
+                        line, column = token.position.line, token.position.column
+                        offsets[token.value].append(line_starts[line - 1] + column - 1)
+            except javalang.tokenizer.LexerError as e:
+                print(f"[AST] Could not tokenize {self.file_path or 'source'}: {e}")
+                offsets.clear()
+            self._identifier_offsets = dict(offsets)
+        
+        return self._identifier_offsets.get(name, [])
+    
     def _process_class(self, class_node: javalang.tree.ClassDeclaration) -> None:
         """Process a class declaration with full semantic information."""
         try:
@@ -535,6 +639,9 @@ class JavaASTAnalyzer:
                     prev_method = self._current_method
                     self._current_method = method_info
                     
+                    # Record where each local variable is declared
+                    self._record_local_var_defs(method_node, method_info)
+                    
                     # Process method body (if needed in the future)
                     # self._process_method_body(method_node.body, method_info)
                     
@@ -553,6 +660,13 @@ class JavaASTAnalyzer:
             traceback.print_exc()
             return None
     
+    def _record_local_var_defs(self, node, method_info: JavaMethod) -> None:
+        """Record the declaration line of each local variable in a method or constructor."""
+        for _, decl in node.filter(javalang.tree.LocalVariableDeclaration):
+            if decl.position:
+                for declarator in decl.declarators:
+                    method_info.local_var_defs[declarator.name] = decl.position.line
+    
     def _process_constructor(self, constructor_node):
         """
         Process a constructor declaration with enhanced error handling and type safety.
@@ -669,6 +783,9 @@ class JavaASTAnalyzer:
                     prev_method = self._current_method
                     self._current_method = constructor_info
                     
+                    # Record where each local variable is declared
+                    self._record_local_var_defs(constructor_node, constructor_info)
+                    
                     # Process constructor body (if needed in the future)
                     # self._process_constructor_body(constructor_node.body, constructor_info)
                     
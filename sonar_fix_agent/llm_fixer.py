@@ -6,6 +6,13 @@ import string
 import json
 import os
 import logging
+import atexit
+import hashlib
+import io
+import threading
+from collections import Counter
+
+from .config import CACHE_DIR
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +21,105 @@ logger = logging.getLogger(__name__)
 # Type variable for the fixer function
 T = TypeVar('T', bound=Callable[..., Optional[str]])
 
+# Patterns used by the rule-based fixers, compiled once at import
+_RE_METHOD_CALL = re.compile(r'(\w+)\s*\(')
+_RE_CRED = re.compile(r'(\w+\s*=\s*["\'])([^"\']*?)(["\'])')
+_RE_JDBC = re.compile(r'(jdbc:[^"\']+)["\']', re.IGNORECASE)
+_RE_USER = re.compile(r'(user(name)?\s*=\s*["\'])([^"\']*)(["\'])', re.IGNORECASE)
+_RE_PASS = re.compile(r'((password|pwd)\s*=\s*["\'])([^"\']*)(["\'])', re.IGNORECASE)
+# Line declaring a public class, capturing its name
+_RE_PUBLIC_CLASS = re.compile(r'^[ \t]*public\s+class\s+(\w+)', re.MULTILINE)
+# Whole lines that are // comments, or /* ... */ blocks starting a line through
+# the end of their closing line (or of the file, if never closed)
+_RE_COMMENT_LINES = re.compile(r'^[ \t]*(?://[^\n]*|/\*.*?(?:\*/[^\n]*|\Z))(?:\n|\Z)', re.MULTILINE | re.DOTALL)
+# Substrings that mark a name or value as a likely credential
+_RE_CREDENTIAL_INDICATOR = re.compile(r'pass|pwd|secret|key|token|credential', re.IGNORECASE)
+# Keywords the credential fixers look for, found in one pass over the file
+_CRED_KEYWORDS = frozenset(('pass', 'password', 'pwd', 'secret', 'key'))
+_DB_CRED_KEYWORDS = frozenset(('user', 'password', 'pwd'))
+_JDBC_KEYWORD = 'jdbc:'
+_ALL_KEYWORDS = _CRED_KEYWORDS | _DB_CRED_KEYWORDS | {_JDBC_KEYWORD}
+# Longest alternatives first so 'password' wins over 'pass'
+_RE_KEYWORDS = re.compile(
+    '|'.join(re.escape(w) for w in sorted(_ALL_KEYWORDS, key=len, reverse=True)),
+    re.IGNORECASE,
+)
+
+def _keyword_line_spans(code: str) -> List[Tuple[int, int, set]]:
+    """Return ``(start, end, keywords)`` for each line of ``code`` holding a credential keyword.
+
+    ``start``/``end`` are offsets of the line in ``code``, excluding its newline.
+    """
+    hits = ((m.start(), m.group(0).lower()) for m in _RE_KEYWORDS.finditer(code))
+    spans: List[Tuple[int, int, set]] = []
+    for start, word in hits:
+        line_start = code.rfind('\n', 0, start) + 1
+        if spans and spans[-1][0] == line_start:
+            spans[-1][2].add(word)
+            continue
+        line_end = code.find('\n', start)
+        spans.append((line_start, len(code) if line_end == -1 else line_end, {word}))
+    return spans
+
+def _render(lines: List[str], pending: Optional[Dict[int, List[str]]] = None) -> str:
+    """Join ``lines`` with newlines, emitting queued insertions as it goes.
+
+    Output is streamed into a StringIO, so the rebuilt line list is never
+    materialized alongside the joined result.
+    """
+    pending = pending or {}
+    buf = io.StringIO()
+    sep = ''
+    for i in range(len(lines) + 1):
+        # Queued lines go before line i; index len(lines) appends at the end
+        for text in pending.get(i, ()):
+            buf.write(sep)
+            buf.write(text)
+            sep = '\n'
+        if i < len(lines):
+            buf.write(sep)
+            buf.write(lines[i])
+            sep = '\n'
+    return buf.getvalue()
+
+# Persistent cache of rule-based fixer results keyed by content hash and rule.
+# Rule fixers are deterministic, so their declines are stored too (as _NO_FIX);
+# complex-fixer results are not kept here, LLM responses have their own cache
+_cache_path = Path(CACHE_DIR) / 'patch_cache.json'
+_NO_FIX = '__sonar_fix_none__'
+# Most recently used entries kept; older ones are evicted
+_PATCH_CACHE_SIZE = 1024
+_patch_cache: Optional[Dict[str, str]] = None
+_patch_cache_lock = threading.Lock()
+
+def _load_patch_cache() -> Dict[str, str]:
+    """Load the patch cache from disk once per process."""
+    global _patch_cache
+    with _patch_cache_lock:
+        if _patch_cache is None:
+            try:
+                _patch_cache = json.loads(_cache_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                _patch_cache = {}
+            atexit.register(_save_patch_cache)
+    return _patch_cache
+
+def _save_patch_cache() -> None:
+    """Write the patch cache back to disk at process exit."""
+    if not _patch_cache:
+        return
+    try:
+        _cache_path.parent.mkdir(parents=True, exist_ok=True)
+        _cache_path.write_text(json.dumps(_patch_cache), encoding='utf-8')
+    except OSError as e:
+        logger.warning(f"Could not save patch cache: {str(e)}")
+
+def _patch_cache_key(code: str, rule: str, message: str) -> str:
+    """Hash the inputs generate_patch is deterministic in."""
+    digest = hashlib.sha256(code.encode('utf-8'))
+    digest.update(b'\0' + message.encode('utf-8'))
+    return f"{digest.hexdigest()}:{rule}"
+
 # Import the complex issue fixer
 try:
     from .complex_issue_fixer import ComplexIssueFixer
@@ -32,9 +138,7 @@ class CredentialManager:
     @staticmethod
     def is_potential_credential(value: str) -> bool:
         """Check if a string looks like a hardcoded credential."""
-        credential_indicators = ['pass', 'pwd', 'secret', 'key', 'token', 'credential']
-        value_lower = value.lower()
-        return any(indicator in value_lower for indicator in credential_indicators)
+        return _RE_CREDENTIAL_INDICATOR.search(value) is not None
 
 # Cache for complex issue fixer
 _complex_fixer = None
@@ -46,37 +150,16 @@ def get_complex_fixer() -> Optional[ComplexIssueFixer]:
         _complex_fixer = ComplexIssueFixer()
     return _complex_fixer
 
+# Dictionary to store rule-based fixers, filled in by @rule_based_fix
+_rule_fixers: Dict[str, Callable[..., Optional[str]]] = {}
+
 def rule_based_fix(rule: str) -> Callable[[T], T]:
     """Decorator to register a rule-based fixer function."""
     def decorator(func: T) -> T:
-        if not hasattr(func, '_sonar_rules'):
-            func._sonar_rules = []  # type: ignore
-        func._sonar_rules.append(rule)  # type: ignore
+        _rule_fixers[rule] = func
         return func
     return decorator
 
-# Dictionary to store rule-based fixers
-_rule_fixers = {}
-
-def register_fixers() -> None:
-    """Register all rule-based fixers."""
-    global _rule_fixers
-    
-    # Clear existing fixers
-    _rule_fixers = {}
-    
-    # Register all functions with the @rule_based_fix decorator
-    for name, func in globals().items():
-        if hasattr(func, '_sonar_rules'):
-            for rule in func._sonar_rules:  # type: ignore
-                _rule_fixers[rule] = func
-
-@rule_based_fix('java:S1118')
-@rule_based_fix('java:S1481')
-@rule_based_fix('java:S125')
-@rule_based_fix('java:S2190')
-@rule_based_fix('java:S6437')
-@rule_based_fix('java:S6703')
 def generate_patch(file_path: str, code: str, rule: str, message: str, context: Optional[Dict[str, Any]] = None) -> Optional[str]:
     """
     Patch generator for Java Sonar issues using a hybrid approach.
@@ -96,16 +179,108 @@ def generate_patch(file_path: str, code: str, rule: str, message: str, context:
     """
     context = context or {}
     
-    # Try rule-based fix first
-    if rule in _rule_fixers:
-        try:
-            fixed_code = _rule_fixers[rule](code, message, context)
-            if fixed_code is not None:
-                return fixed_code
-        except Exception as e:
-            logger.warning(f"Rule-based fixer for {rule} failed: {str(e)}")
+    fixed_code = _rule_based_patch(code, rule, message, context)
+    if fixed_code is not None:
+        return fixed_code
+    return _complex_patch(file_path, code, rule, message, context)
+
+def _flagged_line_changed(original: str, fixed: str, issue: Dict[str, Any]) -> bool:
+    """Whether the line Sonar flagged for issue no longer appears in fixed.
+    
+    A combined patch cannot say which issues it addressed; an issue only
+    counts as fixed by it if the text of its flagged line is gone.
+    """
+    line = issue.get('line')
+    lines = original.splitlines()
+    if not isinstance(line, int) or not 0 < line <= len(lines):
+        return False
+    flagged = lines[line - 1].strip()
+    return bool(flagged) and flagged not in {text.strip() for text in fixed.splitlines()}
+
+def generate_patch_multi(file_path: str, code: str, issues: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Patch several Sonar issues of one file, sending the file to the LLM at most once.
+    
+    Rule-based fixers are applied first, one issue at a time. The issues they
+    cannot handle are then described together in a single complex-fixer
+    request, instead of one request (and one copy of the file) per issue.
+    Only issues whose flagged line the combined patch changed are reported
+    fixed by it; each other remaining issue is retried alone with the
+    complex fixer.
+    
+    Args:
+        file_path: Path to the file being analyzed
+        code: The source code to analyze
+        issues: Sonar issues for this file, each with 'rule' and 'message'
+        
+    Returns:
+        Tuple of the patched code (unchanged if nothing applied) and the fixed issues
+    """
+    fixed: List[Dict[str, Any]] = []
+    remaining: List[Dict[str, Any]] = []
+    for issue in issues:
+        fixed_code = _rule_based_patch(code, issue['rule'], issue['message'], {})
+        if fixed_code is not None and fixed_code != code:
+            code = fixed_code
+            fixed.append(issue)
+        else:
+            remaining.append(issue)
     
-    # For complex issues, try the LLM-based fixer
+    if len(remaining) > 1:
+        rules = sorted({issue['rule'] for issue in remaining})
+        message = '\n'.join(
+            f"  - [{issue['rule']}] line {issue.get('line', '?')}: {issue['message']}" for issue in remaining
+        )
+        fixed_code = _complex_patch(file_path, code, rules[0], '\n' + message, {'rules': rules})
+        if fixed_code and fixed_code != code:
+            verified = [issue for issue in remaining if _flagged_line_changed(code, fixed_code, issue)]
+            if verified:
+                code = fixed_code
+                fixed.extend(verified)
+                verified_ids = {id(issue) for issue in verified}
+                remaining = [issue for issue in remaining if id(issue) not in verified_ids]
+    
+    # One issue left, or issues the combined patch did not verifiably fix;
+    # their rule-based fixers already declined, so go straight to the complex fixer
+    for issue in remaining:
+        fixed_code = _complex_patch(file_path, code, issue['rule'], issue['message'], {})
+        if fixed_code and fixed_code != code:
+            code = fixed_code
+            fixed.append(issue)
+    return code, fixed
+
+def _rule_based_patch(code: str, rule: str, message: str, context: Dict[str, Any]) -> Optional[str]:
+    """Run the rule-based fixer for rule, reusing its result for unchanged inputs."""
+    # One dict lookup, and no cache or try block at all for the many rules
+    # without a rule-based fixer
+    fixer = _rule_fixers.get(rule)
+    if fixer is None:
+        return None
+    
+    cache = _load_patch_cache()
+    cache_key = _patch_cache_key(code, rule, message)
+    with _patch_cache_lock:
+        # Re-insert on a hit: dicts keep insertion order, so the head is the LRU entry
+        cached = cache.pop(cache_key, None)
+        if cached is not None:
+            cache[cache_key] = cached
+    if cached is not None:
+        return None if cached == _NO_FIX else cached
+    
+    try:
+        fixed_code = fixer(code, message, context)
+    except Exception as e:
+        # A crash is not a decline; leave it uncached so the next run retries
+        logger.warning(f"Rule-based fixer for {rule} failed: {str(e)}")
+        return None
+    with _patch_cache_lock:
+        cache[cache_key] = _NO_FIX if fixed_code is None else fixed_code
+        while len(cache) > _PATCH_CACHE_SIZE:
+            del cache[next(iter(cache))]
+    return fixed_code
+
+def _complex_patch(file_path: str, code: str, rule: str, message: str, context: Dict[str, Any]) -> Optional[str]:
+    """Ask the complex (LLM-based) fixer for a patch."""
     complex_fixer = get_complex_fixer()
     if complex_fixer is not None:
         try:
@@ -120,10 +295,7 @@ def generate_patch(file_path: str, code: str, rule: str, message: str, context:
             logger.error(f"Complex issue fixer failed: {str(e)}")
     
     return None
-    
-    # Ensure fixers are registered
-    if not _rule_fixers:
-        register_fixers()
+
 @rule_based_fix('java:S2190')
 def fix_infinite_recursion(code: str, message: str, context: Dict[str, Any]) -> Optional[str]:
     """
@@ -139,21 +311,22 @@ def fix_infinite_recursion(code: str, message: str, context: Dict[str, Any]) ->
     """
     lines = code.splitlines()
     modified = False
+    pending: Dict[int, List[str]] = {}
     
     # Look for recursive method calls and add proper termination
     for i, line in enumerate(lines):
         if 'return' in line and '(' in line and ')' in line:
             # Simple case: Add a base case before the recursive call
-            method_name_match = re.search(r'(\w+)\s*\(', line)
+            method_name_match = _RE_METHOD_CALL.search(line)
             if method_name_match:
                 method_name = method_name_match.group(1)
                 # Add a base case check before the recursive call
                 base_case = f'if (baseCaseCondition) {{ return baseCaseValue; }}  // Added base case to prevent infinite recursion'
-                lines.insert(i, '    ' + base_case)
+                pending = {i: ['    ' + base_case]}
                 modified = True
                 break
     
-    return '\n'.join(lines) if modified else None
+    return _render(lines, pending) if modified else None
 
 @rule_based_fix('java:S6437')
 def fix_hardcoded_credentials(code: str, message: str, context: Dict[str, Any]) -> Optional[str]:
@@ -168,31 +341,32 @@ def fix_hardcoded_credentials(code: str, message: str, context: Dict[str, Any])
     Returns:
         str: The patched code, or None if no fix was applied
     """
-    lines = code.splitlines()
-    modified = False
     credential_manager = CredentialManager()
+    # Only lines holding a keyword can need a fix; they are spliced into the
+    # output so the unchanged lines are never split apart or rejoined
+    out: List[str] = []
+    pos = 0
     
-    # Pattern to find potential credential assignments
-    credential_pattern = re.compile(r'(\w+\s*=\s*["\'])([^"\']*?)(["\'])')
-    
-    for i, line in enumerate(lines):
-        if any(keyword in line.lower() for keyword in ['pass', 'pwd', 'secret', 'key']):
-            matches = list(credential_pattern.finditer(line))
-            for match in matches:
-                prefix, value, suffix = match.groups()
-                if credential_manager.is_potential_credential(prefix) or credential_manager.is_potential_credential(value):
-                    # Replace with environment variable
-                    env_var_name = f"{prefix.split('=')[0].strip().upper()}_PASSWORD"
-                    new_line = line[:match.start()] + f"{prefix}" + f'System.getenv(\"{env_var_name}\")' + line[match.end():]
-                    lines[i] = new_line
-                    modified = True
-                    
-                    # Add a comment about setting the environment variable
-                    comment = f"// Set {env_var_name} environment variable with a secure password"
-                    lines.insert(i, comment)
-                    break
+    for start, end, keywords in _keyword_line_spans(code):
+        if not keywords & _CRED_KEYWORDS:
+            continue
+        line = code[start:end]
+        for match in _RE_CRED.finditer(line):
+            prefix, value, suffix = match.groups()
+            if credential_manager.is_potential_credential(prefix) or credential_manager.is_potential_credential(value):
+                # Replace with environment variable
+                env_var_name = f"{prefix.split('=')[0].strip().upper()}_PASSWORD"
+                new_line = line[:match.start()] + f"{prefix}" + f'System.getenv(\"{env_var_name}\")' + line[match.end():]
+                
+                # Add a comment about setting the environment variable
+                out += [code[pos:start], f"// Set {env_var_name} environment variable with a secure password\n", new_line]
+                pos = end
+                break
     
-    return '\n'.join(lines) if modified else None
+    if not out:
+        return None
+    out.append(code[pos:])
+    return ''.join(out)
 
 @rule_based_fix('java:S6703')
 def fix_database_credentials(code: str, message: str, context: Dict[str, Any]) -> Optional[str]:
@@ -207,60 +381,64 @@ def fix_database_credentials(code: str, message: str, context: Dict[str, Any]) -
     Returns:
         str: The patched code, or None if no fix was applied
     """
-    lines = code.splitlines()
-    modified = False
+    # Only lines holding a keyword can need a fix; they are spliced into the
+    # output so the unchanged lines are never split apart or rejoined
+    out: List[str] = []
+    pos = 0
     
-    # Pattern to find JDBC URLs and credentials
-    jdbc_pattern = re.compile(r'(jdbc:[^"\']+)["\']')
-    user_pattern = re.compile(r'(user(name)?\s*=\s*["\'])([^"\']*)(["\'])', re.IGNORECASE)
-    pass_pattern = re.compile(r'((password|pwd)\s*=\s*["\'])([^"\']*)(["\'])', re.IGNORECASE)
-    
-    for i, line in enumerate(lines):
-        if 'jdbc:' in line.lower():
+    for start, end, keywords in _keyword_line_spans(code):
+        line = new_line = code[start:end]
+        comments: List[str] = []
+        if _JDBC_KEYWORD in keywords:
             # Replace JDBC URL with environment variable
-            jdbc_match = jdbc_pattern.search(line)
+            jdbc_match = _RE_JDBC.search(line)
             if jdbc_match:
                 url_var = 'DB_URL'
-                lines[i] = line.replace(jdbc_match.group(0), f'"' + '${' + url_var + '}"')
-                modified = True
+                new_line = line.replace(jdbc_match.group(0), f'"' + '${' + url_var + '}"')
                 
                 # Add a comment about configuration
-                comment = '// Configure database URL in application properties or environment variables'
-                lines.insert(i, comment)
+                comments.append('// Configure database URL in application properties or environment variables\n')
                 
         # Replace username/password with environment variables
-        if any(keyword in line.lower() for keyword in ['user', 'password', 'pwd']):
-            if user_pattern.search(line):
+        if keywords & _DB_CRED_KEYWORDS:
+            if _RE_USER.search(line):
                 user_var = 'DB_USERNAME'
-                lines[i] = user_pattern.sub(r'\1' + '${' + user_var + '}' + r'\4', line)
-                modified = True
+                new_line = _RE_USER.sub(r'\1' + '${' + user_var + '}' + r'\4', new_line)
                 
                 # Add a comment about configuration
-                comment = '// Configure database credentials in environment variables or secure vault'
-                lines.insert(i, comment)
+                comments.append('// Configure database credentials in environment variables or secure vault\n')
                 
-            if pass_pattern.search(line):
+            if _RE_PASS.search(line):
                 pass_var = 'DB_PASSWORD'
-                lines[i] = pass_pattern.sub(r'\1' + '${' + pass_var + '}' + r'\4', line)
-                modified = True
+                new_line = _RE_PASS.sub(r'\1' + '${' + pass_var + '}' + r'\4', new_line)
+        
+        if new_line != line or comments:
+            out += [code[pos:start], *comments, new_line]
+            pos = end
     
-    return '\n'.join(lines) if modified else None
+    if not out:
+        return None
+    out.append(code[pos:])
+    return ''.join(out)
 
 @rule_based_fix('java:S1118')
 def fix_utility_class(code: str, message: str, context: Dict[str, Any]) -> Optional[str]:
     """
     Add private constructor to utility classes (S1118).
     """
-    lines = code.splitlines()
+    match = _RE_PUBLIC_CLASS.search(code)
+    if not match:
+        return None
+    class_name = match.group(1)
+    if re.search(rf'\bprivate\s+{re.escape(class_name)}\s*\(', code):
+        return None  # Already has a private constructor
     
-    if "class " in code and not any("private " + line.strip().split()[1] + "(" in code 
-                                 for line in lines if line.strip().startswith("public " + line.strip().split()[1] + "(")):
-        for i, line in enumerate(lines):
-            if line.strip().startswith("public class "):
-                class_name = line.strip().split()[2].split("{")[0].strip()
-                lines.insert(i + 1, f'    private {class_name}() {{\n        // Private constructor to prevent instantiation\n        throw new UnsupportedOperationException(\"This is a utility class and cannot be instantiated\");\n    }}')
-                return '\n'.join(lines)
-    return None
+    # Splice the constructor in after the class declaration line
+    line_end = code.find('\n', match.end())
+    if line_end == -1:
+        line_end = len(code)
+    constructor = f'    private {class_name}() {{\n        // Private constructor to prevent instantiation\n        throw new UnsupportedOperationException(\"This is a utility class and cannot be instantiated\");\n    }}'
+    return code[:line_end] + '\n' + constructor + code[line_end:]
 
 @rule_based_fix('java:S1481')
 def fix_unused_variables(code: str, message: str, context: Dict[str, Any]) -> Optional[str]:
@@ -268,43 +446,33 @@ def fix_unused_variables(code: str, message: str, context: Dict[str, Any]) -> Op
     Remove unused local variables (S1481).
     """
     lines = code.splitlines()
-    new_lines = []
-    modified = False
-    i = 0
     
-    while i < len(lines):
-        line = lines[i]
+    # Collect the declarations first; files without any skip tokenizing
+    declared: Dict[int, str] = {}
+    for i, line in enumerate(lines):
         if " = " in line and ";" in line and not line.strip().startswith("//"):
             var_name = line.split("=")[0].split()[-1].strip()
-            var_used = any(var_name in l and i != j for j, l in enumerate(lines))
-            if not var_used:
-                modified = True
-                i += 1
-                continue
-        new_lines.append(line)
-        i += 1
+            if var_name.isidentifier():
+                declared[i] = var_name
+    if not declared:
+        return None
     
-    return '\n'.join(new_lines) if modified else None
+    # Count only the declared names, in one regex pass; a variable whose
+    # only occurrence is its own declaration is unused
+    names_re = re.compile(r'\b(?:' + '|'.join(map(re.escape, set(declared.values()))) + r')\b')
+    token_counts = Counter(names_re.findall(code))
+    
+    unused = {i for i, name in declared.items() if token_counts[name] <= 1}
+    if not unused:
+        return None
+    return _render([line for i, line in enumerate(lines) if i not in unused])
 
 @rule_based_fix('java:S125')
 def fix_commented_code(code: str, message: str, context: Dict[str, Any]) -> Optional[str]:
     """
     Remove commented-out code (S125).
     """
-    lines = code.splitlines()
-    new_lines = []
-    modified = False
-    in_comment_block = False
-    for line in lines:
-        stripped = line.strip()
-        if stripped.startswith("/*"):
-            in_comment_block = True
-        if not in_comment_block and not stripped.startswith("//"):
-            new_lines.append(line)
-        if in_comment_block and "*/" in line:
-            in_comment_block = False
-    
-    if len(new_lines) < len(lines):
-        return '\n'.join(new_lines)
-    return None
-    
+    # The regex engine finds and drops every comment line or block in one
+    # pass, including the line that closes a block comment
+    new_code, count = _RE_COMMENT_LINES.subn('', code)
+    return new_code if count else None
@@ -1,7 +1,57 @@
+import json
+import os
+import re
 import requests
-from typing import List, Dict, Any, Optional, Tuple
-from urllib.parse import urljoin
-from .config import SONAR_TOKEN, SONAR_URL, SONAR_ORGANIZATION
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlencode, urljoin
+from .config import SONAR_TOKEN, SONAR_URL, SONAR_ORGANIZATION, CACHE_DIR
+from .http import SESSION
+
+# Sonar's search APIs stop paginating after this many results
+_MAX_RESULTS = 10000
+# Issue pages fetched in parallel once the total is known
+_PAGE_WORKERS = 8
+# Issue fields used downstream; everything else in the payload (flows,
+# impacts, tags, ...) is dropped as each page arrives
+_ISSUE_FIELDS = ('key', 'rule', 'severity', 'type', 'status', 'component',
+                 'message', 'line', 'textRange')
+
+def _slim_issue(issue: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the fields of a Sonar issue that the agent uses."""
+    return {field: issue[field] for field in _ISSUE_FIELDS if field in issue}
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _parse_json(response: requests.Response) -> Any:
+    """Decode a response body, with orjson when it is available."""
+    if orjson is not None:
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            pass  # let requests raise its usual error
+    return response.json()
+
+def _load_json_file(path: str) -> Any:
+    """Read a JSON cache file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def _dump_json_file(path: str, obj: Any) -> None:
+    """Write a JSON cache file."""
+    data = orjson.dumps(obj) if orjson is not None else json.dumps(obj).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(data)
+
+@lru_cache(maxsize=None)
+def _api_url(endpoint: str) -> str:
+    """Absolute URL of a Sonar Web API endpoint, built once per endpoint."""
+    return urljoin(f"{SONAR_URL.rstrip('/')}/api/", endpoint.lstrip('/'))
 
 def make_sonar_request(endpoint: str, params: Optional[Dict] = None) -> Tuple[bool, Dict]:
     """Make a request to the SonarQube API with proper authentication and error handling"""
@@ -12,17 +62,16 @@ def make_sonar_request(endpoint: str, params: Optional[Dict] = None) -> Tuple[bo
     if SONAR_ORGANIZATION:
         params['organization'] = SONAR_ORGANIZATION
     
-    url = urljoin(f"{SONAR_URL.rstrip('/')}/api/", endpoint.lstrip('/'))
+    url = _api_url(endpoint)
     
     try:
-        response = requests.get(
+        response = SESSION.get(
             url,
             params=params,
-            auth=(SONAR_TOKEN, "") if SONAR_TOKEN else None,
             timeout=30
         )
         response.raise_for_status()
-        return True, response.json()
+        return True, _parse_json(response)
     except requests.exceptions.RequestException as e:
         error_msg = str(e)
         if hasattr(e, 'response') and e.response is not None:
@@ -83,10 +132,68 @@ def list_projects() -> List[Dict[str, Any]]:
     
     return all_projects
 
-def fetch_issues(project_key: str) -> List[Dict[str, Any]]:
+def get_latest_analysis_key(project_key: str) -> Optional[str]:
+    """Return the key of the project's most recent analysis, or None if unknown."""
+    success, result = make_sonar_request('project_analyses/search', {'project': project_key, 'ps': 1})
+    if not success:
+        return None
+    analyses = result.get('analyses') or []
+    return analyses[0].get('key') if analyses else None
+
+def _issues_cache_path(project_key: str) -> str:
+    """Path of the cached issue list for a project."""
+    safe_key = re.sub(r'[^\w.-]', '_', project_key)
+    return os.path.join(CACHE_DIR, f"issues-{safe_key}.json")
+
+def load_cached_issues(project_key: str, analysis_key: str) -> Optional[List[Dict[str, Any]]]:
+    """Return the cached issues if they were fetched for this same analysis."""
+    try:
+        cached = _load_json_file(_issues_cache_path(project_key))
+    except (OSError, ValueError):
+        return None
+    if cached.get('analysis') != analysis_key:
+        return None
+    return cached.get('issues')
+
+def store_cached_issues(project_key: str, analysis_key: str, issues: List[Dict[str, Any]]) -> None:
+    """Remember the issues fetched for an analysis."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _dump_json_file(_issues_cache_path(project_key), {'analysis': analysis_key, 'issues': issues})
+    except OSError as e:
+        print(f"⚠️ Could not cache issues: {str(e)}")
+
+def _fixed_keys_path(project_key: str) -> str:
+    """Path of the set of issue keys already fixed for a project."""
+    safe_key = re.sub(r'[^\w.-]', '_', project_key)
+    return os.path.join(CACHE_DIR, f"fixed-{safe_key}.json")
+
+def load_fixed_keys(project_key: str) -> Set[str]:
+    """Return the keys of issues a previous run already opened a PR for."""
+    try:
+        return set(_load_json_file(_fixed_keys_path(project_key)))
+    except (OSError, ValueError, TypeError):
+        return set()
+
+def store_fixed_keys(project_key: str, keys: Set[str]) -> None:
+    """Persist the fixed issue keys, replacing the file atomically."""
+    path = _fixed_keys_path(project_key)
+    tmp_path = f"{path}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _dump_json_file(tmp_path, sorted(keys))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Could not save fixed issue keys: {str(e)}")
+
+def fetch_issues(project_key: str, *, rules: Optional[Iterable[str]] = None,
+                 severities: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
     """
     Fetch all issues from SonarQube/SonarCloud for the given project_key.
     Handles pagination automatically.
+    
+    rules and severities, when given, are passed to issues/search so the
+    server only returns matching issues.
     """
     print(f"\n🔍 Fetching issues for project: {project_key}")
     print(f"🔗 SonarQube URL: {SONAR_URL}")
@@ -105,67 +212,86 @@ def fetch_issues(project_key: str) -> List[Dict[str, Any]]:
             for proj in projects:
                 print(f"   - {proj.get('key')} (Name: {proj.get('name', 'N/A')})")
         return []
-    def try_fetch_issues(params, endpoint="issues/search"):
-        """Helper function to try fetching issues with given parameters"""
-        nonlocal page, page_size, issues
+    
+    # Issues only change with a new analysis; reuse the last fetch if the
+    # latest analysis is the one it was made for
+    search_filters = {}
+    if rules:
+        search_filters['rules'] = ','.join(sorted(rules))
+    if severities:
+        search_filters['severities'] = ','.join(sorted(severities))
+    
+    analysis_key = get_latest_analysis_key(project_key)
+    if analysis_key and search_filters:
+        # Differently filtered fetches of the same analysis must not share a cache entry
+        analysis_key = f"{analysis_key}?{urlencode(search_filters)}"
+    if analysis_key:
+        cached = load_cached_issues(project_key, analysis_key)
+        if cached is not None:
+            print(f"✅ Using {len(cached)} cached issues for analysis {analysis_key}")
+            return cached
+    
+    def try_fetch_issues(params, endpoint="issues/search", page=1):
+        """Helper function to try fetching one page of issues with given parameters.
         
-        while True:
-            url = f"{SONAR_URL.rstrip('/')}/api/{endpoint}"
-            params.update({"ps": page_size, "p": page})
-            
-            print(f"\n📡 Requesting {endpoint} (page {page})...")
-            print(f"   URL: {url}")
-            print(f"   Params: { {k: v for k, v in params.items() if k not in ['ps', 'p']} }")
+        Returns the page's issues, the reported total, and whether the request succeeded.
+        """
+        url = _api_url(endpoint)
+        params = {**params, "ps": page_size, "p": page}
+        
+        print(f"\n📡 Requesting {endpoint} (page {page})...")
+        print(f"   URL: {url}")
+        print(f"   Params: { {k: v for k, v in params.items() if k not in ['ps', 'p']} }")
 
-            try:
-                response = requests.get(
-                    url, 
-                    params=params, 
-                    auth=(SONAR_TOKEN, "") if SONAR_TOKEN else None,
-                    timeout=30
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                print(f"   Response keys: {list(data.keys())}")
-                
-                # Handle different response formats
-                if "issues" in data:
-                    page_issues = data["issues"]
-                    total = data.get("total", 0)
-                    print(f"   ✅ Fetched {len(page_issues)} issues from page {page}")
-                    print(f"   Total issues in response: {total}")
-                    
-                    if page_issues:
-                        print("\n📝 Sample issue:")
-                        sample = page_issues[0]
-                        for key in ['rule', 'message', 'component', 'status', 'severity']:
-                            print(f"   {key}: {sample.get(key)}")
-                    
-                    return page_issues, total
-                
-                elif "hotspots" in data:  # For security hotspots
-                    page_issues = data["hotspots"]
-                    total = data.get("paging", {}).get("total", 0)
-                    print(f"   🔥 Fetched {len(page_issues)} security hotspots from page {page}")
-                    return page_issues, total
+        try:
+            response = SESSION.get(
+                url, 
+                params=params, 
+                timeout=30
+            )
+            response.raise_for_status()
+            data = _parse_json(response)
+            
+            print(f"   Response keys: {list(data.keys())}")
+            
+            # Handle different response formats
+            if "issues" in data:
+                page_issues = [_slim_issue(issue) for issue in data["issues"]]
+                total = data.get("total", 0)
+                print(f"   ✅ Fetched {len(page_issues)} issues from page {page}")
+                print(f"   Total issues in response: {total}")
                 
-                else:
-                    print(f"   ⚠️ Unexpected response format. Available keys: {list(data.keys())}")
-                    if "errors" in data:
-                        print(f"   ❌ Errors: {data['errors']}")
-                    return [], 0
+                if page_issues:
+                    print("\n📝 Sample issue:")
+                    sample = page_issues[0]
+                    for key in ['rule', 'message', 'component', 'status', 'severity']:
+                        print(f"   {key}: {sample.get(key)}")
                 
-            except requests.exceptions.RequestException as e:
-                print(f"   ❌ Error: {str(e)}")
-                if hasattr(e, 'response') and e.response is not None:
-                    print(f"   Status: {e.response.status_code}")
-                    print(f"   Body: {e.response.text[:500]}")
-                return [], 0
+                return page_issues, total, True
+            
+            elif "hotspots" in data:  # For security hotspots
+                page_issues = data["hotspots"]
+                total = data.get("paging", {}).get("total", 0)
+                print(f"   🔥 Fetched {len(page_issues)} security hotspots from page {page}")
+                return page_issues, total, True
+            
+            else:
+                print(f"   ⚠️ Unexpected response format. Available keys: {list(data.keys())}")
+                if "errors" in data:
+                    print(f"   ❌ Errors: {data['errors']}")
+                return [], 0, False
+            
+        except requests.exceptions.RequestException as e:
+            print(f"   ❌ Error: {str(e)}")
+            if hasattr(e, 'response') and e.response is not None:
+                print(f"   Status: {e.response.status_code}")
+                print(f"   Body: {e.response.text[:500]}")
+            return [], 0, False
     
     # Initialize variables
     issues = []
-    page = 1
+    # False once any page of the endpoint in use fails; a partial result is not cached
+    complete = True
     page_size = 50  # Smaller page size for reliability
     
     print(f"🔍 Fetching issues for project: {project_key}")
@@ -175,41 +301,57 @@ def fetch_issues(project_key: str) -> List[Dict[str, Any]]:
     # Try different API endpoints and parameters
     endpoints_to_try = [
         # Try with component key as is
-        ({"componentKeys": project_key, "resolved": "false"}, "issues/search"),
+        ({"componentKeys": project_key, "resolved": "false", **search_filters}, "issues/search"),
         # Try with project key only (without organization)
-        ({"componentKeys": project_key.split(':')[-1], "resolved": "false"}, "issues/search"),
+        ({"componentKeys": project_key.split(':')[-1], "resolved": "false", **search_filters}, "issues/search"),
         # Try with additional parameters
-        ({"componentKeys": project_key, "statuses": "OPEN,CONFIRMED,REOPENED"}, "issues/search"),
+        ({"componentKeys": project_key, "statuses": "OPEN,CONFIRMED,REOPENED", **search_filters}, "issues/search"),
         # Try with all issues including resolved ones
-        ({"componentKeys": project_key}, "issues/search"),
+        ({"componentKeys": project_key, **search_filters}, "issues/search"),
         # Try the project_issues endpoint
         ({"project": project_key}, "project_issues/search"),
         # Try hotspots endpoint
         ({"projectKey": project_key}, "hotspots/search"),
     ]
     
+    # An empty filtered result is expected, not a sign of a wrong project key
+    filtered_empty = False
     for params, endpoint in endpoints_to_try:
         print(f"\n🔍 Trying endpoint: {endpoint} with params: {params}")
-        page_issues, total = try_fetch_issues(params, endpoint)
+        page_issues, total, ok = try_fetch_issues(params, endpoint)
+        if not page_issues and ok and search_filters:
+            # The filters are exact, so an answered query with no match is
+            # final; the fallbacks below would only widen or drop them
+            print("✅ No open issues match the rule/severity filters")
+            filtered_empty = True
+            break
         
         if page_issues:
             issues.extend(page_issues)
-            print(f"✅ Successfully fetched {len(page_issues)} issues using {endpoint}")
+            # Page 1 reports the total, so the remaining pages are known up
+            # front and fetched concurrently (Sonar serves at most 10k results)
+            n_pages = min(-(-total // page_size), _MAX_RESULTS // page_size)
+            if n_pages > 1:
+                with ThreadPoolExecutor(max_workers=min(_PAGE_WORKERS, n_pages - 1)) as pool:
+                    pages = pool.map(lambda p: try_fetch_issues(params, endpoint, p), range(2, n_pages + 1))
+                    for more_issues, _, ok in pages:
+                        issues.extend(more_issues)
+                        complete = complete and ok
+            print(f"✅ Successfully fetched {len(issues)} issues using {endpoint}")
             break
     
     # If still no issues, try to get project info to verify the project key
-    if not issues:
+    if not issues and not filtered_empty:
         print("\n🔍 No issues found. Trying to verify project key...")
         try:
-            url = f"{SONAR_URL.rstrip('/')}/api/components/show"
-            response = requests.get(
+            url = _api_url('components/show')
+            response = SESSION.get(
                 url,
                 params={"component": project_key},
-                auth=(SONAR_TOKEN, "") if SONAR_TOKEN else None,
                 timeout=10
             )
             if response.status_code == 200:
-                project_info = response.json()
+                project_info = _parse_json(response)
                 print(f"✅ Project found: {project_info.get('component', {}).get('name')}")
                 print(f"   Key: {project_info.get('component', {}).get('key')}")
                 print(f"   Qualifier: {project_info.get('component', {}).get('qualifier')}")
@@ -222,68 +364,80 @@ def fetch_issues(project_key: str) -> List[Dict[str, Any]]:
     print(f"\n📊 Total issues found: {len(issues)}")
     if issues:
         print(f"   First issue rule: {issues[0].get('rule', 'N/A')}")
-    else:
+    elif not filtered_empty:
         print("   No issues found. Please verify:")
         print("   1. The project key is correct")
         print("   2. The token has the right permissions")
         print("   3. There are actually issues in the project")
         print("   4. The issues are not filtered out by the query parameters")
     
+    if not complete:
+        print("   ⚠️ Some pages could not be fetched; the result is not cached")
+    elif (issues or filtered_empty) and analysis_key:
+        store_cached_issues(project_key, analysis_key, issues)
+    
     return issues
 
+# Expanded list of auto-fixable rules
+SAFE_RULES = frozenset({
+    # Java rules
+    "java:S1118",    # Add a private constructor to hide the implicit public one
+    "java:S1481",   # Remove unused local variables
+    "java:S125",     # Remove commented-out code
+    "java:S1068",    # Unused private fields should be removed
+    "java:S1144",    # Unused "private" methods should be removed
+    "java:S1134",    # "FIXME" tags should be handled
+    "java:S1135",    # "TODO" tags should be handled
+    "java:S1125",    # Boolean literals should not be redundant
+    "java:S1121",    # Assignments should not be made from within sub-expressions
+    "java:S1128",    # Unused imports should be removed
+    "java:S1488",    # Local Variables should not be declared and then immediately returned or thrown
+    "java:S1854",    # Unused assignments should be removed
+    "java:S2094",    # Classes should not be empty
+    "java:S2097",    # "@Nonnull" or similar annotations should not be used on methods with primitive return types
+    "java:S2130",    # Parsing should be used to convert "Strings" to primitives
+    "java:S2209",    # "@NonNull" values should not be set to null
+    "java:S2786",    # "assertTrue" should not be used to test the Strings returned by "toString()"
+    "java:S2975",    # "@Nonnull" or similar annotations should not be used on methods with primitive return types
+    "java:S3457",    # "String#replace" should be preferred to "String#replaceAll"
+    "java:S3862",    # "@Nonnull" or similar annotations should not be used on methods with primitive return types
+    "java:S4275",    # "@Nonnull" or similar annotations should not be used on methods with primitive return types
+    "java:S4973",    # "@Nonnull" or similar annotations should not be used on methods with primitive return types
+    
+    # Common code smells that can be auto-fixed
+    "common-java:InsufficientCommentDensity",
+    "common-java:InsufficientLineCoverage",
+    "common-java:DuplicatedBlocks",
+})
+
+# Severities in fix order; anything unknown is treated as the lowest
+_SEVERITY_ORDER = ("BLOCKER", "CRITICAL", "MAJOR", "MINOR", "INFO")
+
 def choose_auto_fixables(issues):
     """
     Filter issues that can be auto-fixed by the agent.
     Currently we consider some common safe rules.
+    Returns the matches ordered by severity, most severe first.
     """
-    # Expanded list of auto-fixable rules
-    SAFE_RULES = {
-        # Java rules
-        "java:S1118",    # Add a private constructor to hide the implicit public one
-        "java:S1481",   # Remove unused local variables
-        "java:S125",     # Remove commented-out code
-        "java:S1068",    # Unused private fields should be removed
-        "java:S1144",    # Unused "private" methods should be removed
-        "java:S1134",    # "FIXME" tags should be handled
-        "java:S1135",    # "TODO" tags should be handled
-        "java:S1125",    # Boolean literals should not be redundant
-        "java:S1121",    # Assignments should not be made from within sub-expressions
-        "java:S1128",    # Unused imports should be removed
-        "java:S1488",    # Local Variables should not be declared and then immediately returned or thrown
-        "java:S1854",    # Unused assignments should be removed
-        "java:S2094",    # Classes should not be empty
-        "java:S2097",    # "@Nonnull" or similar annotations should not be used on methods with primitive return types
-        "java:S2130",    # Parsing should be used to convert "Strings" to primitives
-        "java:S2209",    # "@NonNull" values should not be set to null
-        "java:S2786",    # "assertTrue" should not be used to test the Strings returned by "toString()"
-        "java:S2975",    # "@Nonnull" or similar annotations should not be used on methods with primitive return types
-        "java:S3457",    # "String#replace" should be preferred to "String#replaceAll"
-        "java:S3862",    # "@Nonnull" or similar annotations should not be used on methods with primitive return types
-        "java:S4275",    # "@Nonnull" or similar annotations should not be used on methods with primitive return types
-        "java:S4973",    # "@Nonnull" or similar annotations should not be used on methods with primitive return types
-        
-        # Common code smells that can be auto-fixed
-        "common-java:InsufficientCommentDensity",
-        "common-java:InsufficientLineCoverage",
-        "common-java:DuplicatedBlocks",
-    }
-    
     print(f"\n🔍 Analyzing {len(issues)} issues for auto-fixable patterns...")
     
-    # Debug: Print all unique rule types
-    rule_types = {issue.get('rule') for issue in issues}
-    print(f"Found {len(rule_types)} unique rule types in SonarQube issues:")
-    for i, rule in enumerate(sorted(rule_types), 1):
-        print(f"  {i}. {rule}")
-    
-    # Filter issues by safe rules
-    auto_fixable = []
+    # Collect rule types and bucket the safe issues by severity in one pass
+    rule_types = set()
+    buckets = {severity: [] for severity in _SEVERITY_ORDER}
+    lowest = buckets[_SEVERITY_ORDER[-1]]
     for issue in issues:
         rule = issue.get('rule')
+        rule_types.add(rule)
         if rule in SAFE_RULES:
-            auto_fixable.append(issue)
+            buckets.get(issue.get('severity'), lowest).append(issue)
             print(f"✅ Will fix {rule}: {issue.get('message')}")
     
+    # Debug: Print all unique rule types
+    print(f"Found {len(rule_types)} unique rule types in SonarQube issues:")
+    for i, rule in enumerate(sorted(rule_types, key=str), 1):
+        print(f"  {i}. {rule}")
+    
+    auto_fixable = [issue for severity in _SEVERITY_ORDER for issue in buckets[severity]]
     print(f"\n📊 Found {len(auto_fixable)} auto-fixable issues out of {len(issues)} total issues")
     
     return auto_fixable
@@ -1,29 +1,129 @@
 """
 Additional SonarQube issue handlers for the JavaSonarFixer class.
 """
+import os
 import re
-from typing import Dict, List, Set, Tuple, Optional
+import shutil
+from collections import Counter
+from typing import Dict, List, Set, Tuple, Optional, Union
 from pathlib import Path
 
+# Empty catch block, java:S108
+_EMPTY_CATCH_RE = re.compile(r'(catch\s*\([^{}]*\)\s*\{\s*\})')
+
+# System.out.print/println call and its argument, java:S106
+_SYSOUT_RE = re.compile(r'System\.out\.print(ln)?\((.*?)\);')
+
+# Method name invoked as ".name(" or " name(", the forms counted as a use
+_CALL_SITE_RE = re.compile(r'[. ](\w+)\(')
+
+# Integer or decimal literal, a magic number candidate
+_NUMBER_RE = re.compile(r'\b(\d+(?:\.\d+)?)\b')
+
+# Lines containing any of these are treated as comments or string literals
+_COMMENT_OR_LITERAL_TOKENS = ('//', '/*', '*', '"', "'")
+
+# Text blocks, string and char literals, and comments; matched first so the
+# size checks inside them are skipped over and kept as they are
+_JAVA_LITERAL_OR_COMMENT = (
+    r'("""[\s\S]*?"""|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|//[^\n]*|/\*[\s\S]*?\*/)'
+)
+# "<receiver>.size() <op> <n>" or "<n> <op> <receiver>.size()"
+_SIZE_RECEIVER = r'(\b\w+(?:\(\))?(?:\.\w+(?:\(\))?)*)\.size\(\)'
+_SIZE_CHECK_RE = re.compile(
+    _JAVA_LITERAL_OR_COMMENT
+    + r'|' + _SIZE_RECEIVER + r'\s*(==|!=|>=|>|<=|<)\s*(\d+)\b(?!\.)'
+    r'|\b(\d+)\s*(==|!=|>=|>|<=|<)\s*' + _SIZE_RECEIVER
+)
+
+# (operator, operand) -> whether the size check means "is empty", written
+# as "size() <op> n"; the reversed form is mirrored before the lookup
+_SIZE_CHECK_EMPTY = {
+    ('==', '0'): True,
+    ('<=', '0'): True,
+    ('<', '1'): True,
+    ('!=', '0'): False,
+    ('>', '0'): False,
+    ('>=', '1'): False,
+}
+_MIRRORED_OPS = {'==': '==', '!=': '!=', '<': '>', '>': '<', '<=': '>=', '>=': '<='}
+
+def _rewrite_size_check(match: re.Match) -> str:
+    """Rewrite one size() comparison as an isEmpty() call when it tests for emptiness."""
+    skipped, receiver, op, operand, r_operand, r_op, r_receiver = match.groups()
+    if skipped is not None:
+        return skipped
+    if receiver is None:
+        receiver, op, operand = r_receiver, _MIRRORED_OPS[r_op], r_operand
+    empty = _SIZE_CHECK_EMPTY.get((op, operand))
+    if empty is None:
+        return match.group(0)
+    return f"{receiver}.isEmpty()" if empty else f"!{receiver}.isEmpty()"
+
+class FileBuffer:
+    """
+    In-memory source of a file shared by several handlers.
+    
+    Every handler accepts either a path or a FileBuffer; given a buffer it
+    reads and edits ``text`` instead of touching the disk, so a caller
+    running several handlers on one file pays for a single read and write.
+    """
+    
+    def __init__(self, path: str, text: str):
+        self.path = path
+        self.text = text
+        self.dirty = False
+    
+    def __str__(self) -> str:
+        return self.path
+
+def _read_source(target: Union[str, FileBuffer], required: Optional[str] = None) -> Optional[str]:
+    """
+    Return the source of a path or buffer.
+    If ``required`` is given and does not occur in the source, return None;
+    files are checked as raw bytes so they are only decoded when they match.
+    """
+    if isinstance(target, FileBuffer):
+        if required is not None and required not in target.text:
+            return None
+        return target.text
+    with open(target, 'rb') as f:
+        raw = f.read()
+    if required is not None and required.encode('utf-8') not in raw:
+        return None
+    return raw.decode('utf-8')
+
+def _write_source(target: Union[str, FileBuffer], text: str) -> None:
+    """Store new source into a buffer, or write it to the path."""
+    if isinstance(target, FileBuffer):
+        target.text = text
+        target.dirty = True
+        return
+    # Write a sibling file and swap it in, so a crash never leaves a
+    # half-written source file behind
+    tmp_path = f"{target}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    shutil.copymode(target, tmp_path)
+    os.replace(tmp_path, target)
+
 class SonarHandlers:
     @staticmethod
-    def fix_empty_catch_block(file_path: str) -> bool:
+    def fix_empty_catch_block(file_path: Union[str, FileBuffer]) -> bool:
         """Fix empty catch blocks (java:S108)."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = _read_source(file_path, 'catch')
+            if content is None:
+                return False
             
             # Find empty catch blocks and add a TODO comment
-            pattern = r'(catch\s*\([^{}]*\)\s*\{\s*\})'
-            new_content = re.sub(
-                pattern, 
+            new_content = _EMPTY_CATCH_RE.sub(
                 r'\1 { \n            // TODO: Add proper exception handling\n            logger.error("Exception occurred: ", e);\n        }', 
                 content
             )
             
             if new_content != content:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
+                _write_source(file_path, new_content)
                 return True
                 
         except Exception as e:
@@ -32,74 +132,56 @@ class SonarHandlers:
         return False
         
     @staticmethod
-    def fix_magic_numbers(file_path: str) -> bool:
+    def fix_magic_numbers(file_path: Union[str, FileBuffer]) -> bool:
         """Fix magic numbers by replacing with named constants (java:S109)."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            content = _read_source(file_path)
+            lines = content.splitlines(keepends=True)
             
-            modified = False
-            magic_numbers = set()
-            
-            # First pass: Find all magic numbers
-            for i, line in enumerate(lines):
-                # Skip comments and string literals
-                if '//' in line or '/*' in line or '*' in line or '"' in line or "'" in line:
-                    continue
-                    
-                # Find all numbers in the line
-                numbers = re.findall(r'\b(\d+(\.\d+)?)\b', line)
-                for num, _ in numbers:
-                    # Skip 0, 1, and -1 as they are commonly used
-                    if num not in ['0', '1', '-1']:
-                        magic_numbers.add(num)
+            # Find all magic numbers in one scan over the lines that are not
+            # comments or string literals; 0 and 1 are commonly used, so skip them
+            code = ''.join(line for line in lines
+                           if not any(token in line for token in _COMMENT_OR_LITERAL_TOKENS))
+            magic_numbers = set(_NUMBER_RE.findall(code)) - {'0', '1'}
             
             if not magic_numbers:
                 return False
                 
             # Generate constant names
             constants = {}
-            for num in magic_numbers:
+            for num in sorted(magic_numbers):
                 const_name = f"MAGIC_NUMBER_{num.replace('.', '_').replace('-', 'NEG_')}"
                 constants[num] = const_name
             
-            # Add constant declarations at the class level
+            # Find the opening brace of the class
+            brace_line = None
             for i, line in enumerate(lines):
                 if 'class ' in line and ('public ' in line or 'final ' in line):
-                    # Find the opening brace of the class
                     brace_line = i
                     while brace_line < len(lines) and '{' not in lines[brace_line]:
                         brace_line += 1
-                    
-                    if brace_line < len(lines):
-                        # Add constants after the opening brace
-                        indent = ' ' * (len(lines[brace_line]) - len(lines[brace_line].lstrip()))
-                        const_declarations = []
-                        for num, const_name in constants.items():
-                            const_declarations.append(
-                                f"{indent}    private static final int {const_name} = {num};\n"
-                            )
-                        
-                        if const_declarations:
-                            lines.insert(brace_line + 1, '\n' + ''.join(const_declarations))
-                            modified = True
                     break
             
-            # Second pass: Replace magic numbers with constants
-            if modified:
-                for i, line in enumerate(lines):
-                    for num, const_name in constants.items():
-                        # Replace whole word matches that aren't part of other words
-                        pattern = r'\b' + re.escape(num) + r'\b'
-                        new_line = re.sub(pattern, const_name, line)
-                        if new_line != line:
-                            lines[i] = new_line
-                            modified = True
+            if brace_line is None or brace_line >= len(lines):
+                return False
             
-            if modified:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.writelines(lines)
-                return True
+            # Replace all magic numbers with one alternation, longest first so
+            # that 2.5 is not rewritten as 2 followed by .5
+            number_re = re.compile(
+                r'\b(?:' + '|'.join(map(re.escape, sorted(constants, key=len, reverse=True))) + r')\b'
+            )
+            lines = number_re.sub(lambda m: constants[m.group()], content).splitlines(keepends=True)
+            
+            # Add constant declarations after the class's opening brace
+            indent = ' ' * (len(lines[brace_line]) - len(lines[brace_line].lstrip()))
+            const_declarations = ''.join(
+                f"{indent}    private static final int {const_name} = {num};\n"
+                for num, const_name in constants.items()
+            )
+            lines.insert(brace_line + 1, '\n' + const_declarations)
+            
+            _write_source(file_path, ''.join(lines))
+            return True
                 
         except Exception as e:
             print(f"Error fixing magic numbers in {file_path}: {str(e)}")
@@ -107,22 +189,19 @@ class SonarHandlers:
         return False
         
     @staticmethod
-    def fix_system_out_println(file_path: str) -> bool:
+    def fix_system_out_println(file_path: Union[str, FileBuffer]) -> bool:
         """Replace System.out.println with proper logging (java:S106)."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = _read_source(file_path, 'System.out.print')
+            if content is None:
+                return False
             
             # Check if SLF4J is already imported
             has_slf4j = 'import org.slf4j.Logger' in content
             
             # Replace System.out.println with logger calls
             new_content = content
-            new_content = re.sub(
-                r'System\.out\.print(ln)?\((.*?)\);', 
-                r'LOGGER.info(\2);', 
-                new_content
-            )
+            new_content = _SYSOUT_RE.sub(r'LOGGER.info(\2);', new_content)
             
             if new_content != content:
                 # Add SLF4J imports if needed
@@ -143,8 +222,7 @@ class SonarHandlers:
                             new_content[class_pos:]
                         )
                 
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
+                _write_source(file_path, new_content)
                 return True
                 
         except Exception as e:
@@ -153,26 +231,31 @@ class SonarHandlers:
         return False
         
     @staticmethod
-    def fix_unused_private_methods(file_path: str) -> bool:
+    def fix_unused_private_methods(file_path: Union[str, FileBuffer]) -> bool:
         """Flag unused private methods (java:S1144)."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            content = _read_source(file_path, 'private ')
+            if content is None:
+                return False
+            lines = content.splitlines(keepends=True)
+            
+            # Count every call site once up front instead of rescanning all
+            # lines for each private method
+            call_counts = Counter(_CALL_SITE_RE.findall(''.join(lines)))
             
             modified = False
             for i, line in enumerate(lines):
                 if 'private ' in line and ('(' in line or ')' in line) and ';' not in line:
                     # This is a method declaration
                     method_name = line.split('(')[0].split()[-1]
-                    if not any(f'.{method_name}(' in l or f' {method_name}(' in l 
-                             for j, l in enumerate(lines) if j != i):
+                    own_count = _CALL_SITE_RE.findall(line).count(method_name)
+                    if call_counts[method_name] <= own_count:
                         # Method not found in other lines, likely unused
                         lines[i] = line.replace('private ', '// TODO: Remove or use this private method: private ', 1)
                         modified = True
             
             if modified:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.writelines(lines)
+                _write_source(file_path, ''.join(lines))
                 return True
                 
         except Exception as e:
@@ -181,7 +264,7 @@ class SonarHandlers:
         return False
         
     @staticmethod
-    def fix_collection_size_check(file_path: str) -> bool:
+    def fix_collection_size_check(file_path: Union[str, FileBuffer]) -> bool:
         """
         Fix collection size checks to use isEmpty() instead of size() == 0 (java:S1155).
         
@@ -194,72 +277,14 @@ class SonarHandlers:
             - 0 < collection.size()   -> !collection.isEmpty()
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            modified = False
+            content = _read_source(file_path, '.size()')
+            if content is None:
+                return False
             
-            for i, line in enumerate(lines):
-                # Skip comments and string literals
-                if '//' in line or '/*' in line or '*' in line or '"' in line or "'" in line:
-                    continue
-                
-                # Process each line to find and replace size() checks
-                
-                # 1. list.size() == 0  ->  list.isEmpty()
-                if 'size() == 0' in line:
-                    lines[i] = line.replace('size() == 0', 'isEmpty()')
-                    modified = True
-                    continue
-                    
-                # 2. 0 == list.size()  ->  list.isEmpty()
-                if '0 == ' in line and '.size()' in line:
-                    parts = line.split('0 == ')
-                    if len(parts) > 1 and '.size()' in parts[1]:
-                        var = parts[1].split('.size()')[0].strip()
-                        lines[i] = line.replace(f'0 == {var}.size()', f'{var}.isEmpty()')
-                        modified = True
-                        continue
-                
-                # 3. list.size() > 0  ->  !list.isEmpty()
-                if 'size() > 0' in line:
-                    lines[i] = line.replace('size() > 0', '!isEmpty()')
-                    modified = True
-                    continue
-                    
-                # 4. list.size() >= 1  ->  !list.isEmpty()
-                if 'size() >= 1' in line:
-                    lines[i] = line.replace('size() >= 1', '!isEmpty()')
-                    modified = True
-                    continue
-                    
-                # 5. 0 < list.size()  ->  !list.isEmpty()
-                if '0 < ' in line and '.size()' in line:
-                    parts = line.split('0 < ')
-                    if len(parts) > 1 and '.size()' in parts[1]:
-                        var = parts[1].split('.size()')[0].strip()
-                        lines[i] = line.replace(f'0 < {var}.size()', f'!{var}.isEmpty()')
-                        modified = True
-                        continue
-                
-                # 6. list.size() != 0  ->  !list.isEmpty()
-                if 'size() != 0' in line:
-                    lines[i] = line.replace('size() != 0', '!isEmpty()')
-                    modified = True
-                    continue
-                    
-                # 7. 0 != list.size()  ->  !list.isEmpty()
-                if '0 != ' in line and '.size()' in line:
-                    parts = line.split('0 != ')
-                    if len(parts) > 1 and '.size()' in parts[1]:
-                        var = parts[1].split('.size()')[0].strip()
-                        lines[i] = line.replace(f'0 != {var}.size()', f'!{var}.isEmpty()')
-                        modified = True
-                        continue
+            new_content = _SIZE_CHECK_RE.sub(_rewrite_size_check, content)
             
-            if modified:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.writelines(lines)
+            if new_content != content:
+                _write_source(file_path, new_content)
                 return True
                 
         except Exception as e:
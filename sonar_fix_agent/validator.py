@@ -1,14 +1,16 @@
 import subprocess
+from collections import deque
 from pathlib import Path
 
-def run(cmd, cwd=None, check=True):
+def run(cmd, cwd=None, check=True, input=None):
     """
     Helper to run shell commands.
     :param cmd: List of command arguments.
     :param cwd: Directory to run the command in.
     :param check: If True, raise RuntimeError on non-zero exit code.
+    :param input: Optional text fed to the command's stdin.
     """
-    result = subprocess.run(cmd, cwd=cwd, text=True, capture_output=True, check=False)
+    result = subprocess.run(cmd, cwd=cwd, text=True, capture_output=True, check=False, input=input)
     if result.returncode != 0:
         print(f"❌ Command failed: {' '.join(cmd)}")
         print(result.stderr or result.stdout)
@@ -16,11 +18,36 @@ def run(cmd, cwd=None, check=True):
             raise RuntimeError(result.stderr or result.stdout)
     return result.stdout
 
+def run_streamed(cmd, cwd=None, check=True, tail=2000):
+    """
+    Run a long, chatty command without buffering its whole output.
+    stderr is merged into stdout and only the last ``tail`` lines are kept,
+    which is all that is needed to explain a failure.
+    :param cmd: List of command arguments.
+    :param cwd: Directory to run the command in.
+    :param check: If True, raise RuntimeError on non-zero exit code.
+    :param tail: Number of trailing output lines to keep and return.
+    """
+    last_lines = deque(maxlen=tail)
+    with subprocess.Popen(cmd, cwd=cwd, text=True, bufsize=1,
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT) as proc:
+        for line in proc.stdout:
+            last_lines.append(line)
+        returncode = proc.wait()
+    output = ''.join(last_lines)
+    if returncode != 0:
+        print(f"❌ Command failed: {' '.join(cmd)}")
+        print(output)
+        if check:
+            raise RuntimeError(output)
+    return output
+
 def validate_repo(repo_dir):
     try:
         if (Path(repo_dir)/"pom.xml").exists():
             print("🔧 Running mvn verify to validate repository...")
-            run(["mvn", "verify"], cwd=repo_dir)
+            # Parallel module builds, quiet downloads, no integration tests
+            run_streamed(["mvn", "-B", "-T", "1C", "--no-transfer-progress", "-DskipITs", "verify"], cwd=repo_dir)
         return True
     except Exception as e:
         print("⚠️ Validation failed:", e)
@@ -0,0 +1,9 @@
+"""
+Shared pytest setup for the test suite.
+"""
+import os
+import sys
+
+# Make the sonar_fix_agent package importable without installing it; done
+# once here instead of in every test module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
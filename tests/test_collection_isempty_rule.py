@@ -1,16 +1,11 @@
 """
 Test for the java:S1155 rule handler (Collection.isEmpty() should be used to test for emptiness).
 """
-import os
 import shutil
 import tempfile
 import unittest
 from pathlib import Path
 
-# Add the parent directory to the path so we can import the module
-import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from sonar_fix_agent.sonar_handlers import SonarHandlers
 from sonar_fix_agent.java_sonar_fixer import JavaSonarFixer, SonarIssue
 
@@ -81,6 +76,26 @@ public class CollectionTest {
         self.assertNotIn('list.size() != 0', content)
         self.assertNotIn('0 != list.size()', content)
     
+    def test_size_checks_in_literals_and_comments_are_kept(self):
+        """Test that size() comparisons inside strings and comments are not rewritten."""
+        source_file = self.test_dir / "LiteralTest.java"
+        source_file.write_text(
+            'public class LiteralTest {\n'
+            '    void check(java.util.List<String> list) {\n'
+            '        // list.size() == 0 means nothing to do\n'
+            '        if (list.size() == 0) log.info("check list.size() == 0 failed");\n'
+            '    }\n'
+            '}\n',
+            encoding='utf-8',
+        )
+        
+        self.assertTrue(SonarHandlers.fix_collection_size_check(str(source_file)))
+        content = source_file.read_text(encoding='utf-8')
+        
+        self.assertIn('if (list.isEmpty())', content)
+        self.assertIn('log.info("check list.size() == 0 failed");', content)
+        self.assertIn('// list.size() == 0 means nothing to do', content)
+    
     def tearDown(self):
         """Clean up test files."""
         # Remove the entire test directory
@@ -1,45 +1,48 @@
 """Tests for the complex issue fixer functionality."""
 
 import unittest
-import os
-import sys
 from pathlib import Path
-from unittest.mock import MagicMock, patch
-
-# Add the parent directory to the path so we can import the module
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from sonar_fix_agent.complex_issue_fixer import (
     ComplexIssueFixer,
     CodeComplexityMetrics
 )
 
+# Repository root, resolved once for the module
+_PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+
+# Source shared by the complexity and prompt tests
+_SAMPLE_JAVA_CALCULATOR = """\
+public class Calculator {
+    public int add(int a, int b) {
+        return a + b;
+    }
+
+    public int factorial(int n) {
+        if (n <= 1) return 1;
+        return n * factorial(n - 1);
+    }
+}
+"""
+
 class TestComplexIssueFixer(unittest.TestCase):
     """Test cases for the ComplexIssueFixer class."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.fixer = ComplexIssueFixer(
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures shared by all tests."""
+        cls.project_root = _PROJECT_ROOT
+        cls.fixer = ComplexIssueFixer(
             openai_api_key="test_key",
-            project_root=self.project_root
+            project_root=cls.project_root
         )
-        self.sample_java_code = """
-        public class Calculator {
-            public int add(int a, int b) {
-                return a + b;
-            }
-            
-            public int factorial(int n) {
-                if (n <= 1) return 1;
-                return n * factorial(n - 1);
-            }
-        }
-        """
+        cls.sample_java_code = _SAMPLE_JAVA_CALCULATOR
+        # Analyzed once; the tests only read the result
+        cls.sample_analysis = cls.fixer.analyze_complexity(cls.sample_java_code, "Calculator.java")
     
     def test_analyze_complexity(self):
         """Test code complexity analysis."""
-        analysis = self.fixer.analyze_complexity(self.sample_java_code, "Calculator.java")
+        analysis = self.sample_analysis
         
         # Check basic structure
         self.assertIn('methods', analysis)
@@ -47,24 +50,23 @@ class TestComplexIssueFixer(unittest.TestCase):
         self.assertIn('dependencies', analysis)
         self.assertIn('file_metrics', analysis)
         
-        # Check method analysis
-        method_names = [m['name'] for m in analysis['methods']]
-        self.assertTrue(any('add' in name for name in method_names), f"Expected 'add' in method names, got {method_names}")
-        self.assertTrue(any('factorial' in name for name in method_names), f"Expected 'factorial' in method names, got {method_names}")
-        
-        # Check complexity metrics
+        # Check method analysis and complexity metrics in one pass; names are
+        # qualified as Class.method#paramTypes
+        method_names = set()
+        complexity_checks = 0
         for method in analysis['methods']:
-            if method['name'] == 'factorial':
+            short_name = method['name'].rsplit('.', 1)[-1].split('#', 1)[0]
+            method_names.add(short_name)
+            if short_name == 'factorial':
                 self.assertGreater(method['metrics']['cyclomatic_complexity'], 1)
+                complexity_checks += 1
+        self.assertIn('add', method_names)
+        self.assertIn('factorial', method_names)
+        self.assertEqual(complexity_checks, 1)
     
-    @patch('openai.ChatCompletion.create')
-    def test_generate_llm_prompt(self, mock_openai):
+    def test_generate_llm_prompt(self):
         """Test LLM prompt generation."""
-        # Mock the LLM response
-        mock_response = MagicMock()
-        mock_response.choices[0].message.content = "```java\npublic class Test {}\n```"
-        mock_openai.return_value = mock_response
-        
+        # Building the prompt never calls the LLM, so nothing needs mocking
         # Test with a sample issue
         issue = {
             'rule': 'java:S3776',
@@ -72,18 +74,17 @@ class TestComplexIssueFixer(unittest.TestCase):
             'file_path': 'Calculator.java'
         }
         
-        # Generate prompt and get response
+        # Generate prompt
         prompt = self.fixer.generate_llm_prompt(
             self.sample_java_code,
             issue,
-            self.fixer.analyze_complexity(self.sample_java_code, "Calculator.java")
+            self.sample_analysis
         )
         
-        # Verify prompt contains relevant information
-        self.assertIn('SonarQube', prompt)
-        self.assertIn('ISSUE DETAILS', prompt)
-        self.assertIn('CODE METRICS', prompt)
-        self.assertIn('METHOD DETAILS', prompt)
+        # Verify prompt contains relevant information, reporting every missing section at once
+        required = {'SonarQube', 'ISSUE DETAILS', 'CODE METRICS', 'METHOD DETAILS'}
+        missing = {token for token in required if token not in prompt}
+        self.assertEqual(missing, set(), f"Missing from prompt: {sorted(missing)}")
     
     def test_extract_code_from_response(self):
         """Test code extraction from LLM response."""
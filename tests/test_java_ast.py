@@ -1,22 +1,12 @@
 """
 Tests for the Java AST analyzer.
 """
-import os
-import sys
 import unittest
-from pathlib import Path
-
-# Add the parent directory to the path so we can import the module
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from sonar_fix_agent.java_ast import JavaASTAnalyzer, JavaClass, JavaMethod, VariableInfo
 
-class TestJavaASTAnalyzer(unittest.TestCase):
-    """Test cases for the JavaASTAnalyzer class."""
-    
-    def setUp(self):
-        """Set up test fixtures."""
-        self.test_java_file = """
+# Source shared by the analyzer tests
+_SAMPLE_JAVA_TESTCLASS = """
 package com.example;
 
 import java.util.List;
@@ -54,16 +44,25 @@ public class TestClass {
 }
 """
 
+class TestJavaASTAnalyzer(unittest.TestCase):
+    """Test cases for the JavaASTAnalyzer class."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures, parsing the shared source only once."""
+        cls.test_java_file = _SAMPLE_JAVA_TESTCLASS
+        # The tests only read the analysis, so one parse serves all of them
+        cls.analyzer = JavaASTAnalyzer(cls.test_java_file)
+        cls.analyzer.analyze()
+
     def test_analyze_package(self):
         """Test package extraction."""
-        analyzer = JavaASTAnalyzer(self.test_java_file)
-        analyzer.analyze()
+        analyzer = self.analyzer
         self.assertEqual(analyzer.package, "com.example")
 
     def test_analyze_class(self):
         """Test class analysis."""
-        analyzer = JavaASTAnalyzer(self.test_java_file)
-        analyzer.analyze()
+        analyzer = self.analyzer
         
         # Check if the class was found
         self.assertIn("com.example.TestClass", analyzer.classes)
@@ -96,18 +95,56 @@ public class TestClass {
 
     def test_analyze_imports(self):
         """Test import analysis."""
-        analyzer = JavaASTAnalyzer(self.test_java_file)
-        analyzer.analyze()
+        analyzer = self.analyzer
         
         # Check imports
         self.assertIn("java.util.List", analyzer.imports)
         self.assertIn("List", analyzer.imported_classes)
         self.assertEqual(analyzer.imported_classes["List"], "java.util.List")
 
+    def test_method_start_index(self):
+        """Test enclosing-method lookup via the sorted method start lines."""
+        analyzer = self.analyzer
+        
+        # testMethod is declared on line 17 and main on line 22
+        self.assertEqual(analyzer.sorted_method_lines, [17, 22])
+        self.assertEqual(analyzer.get_method_start_line(19), 17)
+        self.assertEqual(analyzer.get_method_start_line(24), 22)
+        self.assertIsNone(analyzer.get_method_start_line(10))
+        # main ends on line 25; the nested interface after it is in no method
+        self.assertEqual(analyzer.get_method_start_line(25), 22)
+        self.assertIsNone(analyzer.get_method_start_line(28))
+
+    def test_local_var_def_lines(self):
+        """Test that locals are indexed in constructors as well as methods."""
+        source = ('class A {\n'
+                  '    A(String id) {\n'
+                  '        String url = "http://x/" + id;\n'
+                  '        call(url);\n'
+                  '    }\n'
+                  '    void run() {\n'
+                  '        int n = 1;\n'
+                  '    }\n'
+                  '}\n')
+        analyzer = JavaASTAnalyzer(source)
+        analyzer.analyze()
+        
+        self.assertEqual(analyzer.get_local_var_def_line(4, 'url'), 3)
+        self.assertEqual(analyzer.get_local_var_def_line(7, 'n'), 7)
+        self.assertIsNone(analyzer.get_local_var_def_line(7, 'url'))
+
+    def test_identifier_offsets(self):
+        """Test that identifier offsets skip comments and string literals."""
+        source = 'class A {\n    // count\n    String s = "count";\n    int count = 1;\n}\n'
+        analyzer = JavaASTAnalyzer(source)
+        
+        offsets = analyzer.get_identifier_offsets("count")
+        self.assertEqual(offsets, [source.index("int count") + 4])
+        self.assertEqual(analyzer.get_identifier_offsets("missing"), [])
+
     def test_analyze_annotations(self):
         """Test annotation analysis."""
-        analyzer = JavaASTAnalyzer(self.test_java_file)
-        analyzer.analyze()
+        analyzer = self.analyzer
         
         # Check class annotations
         java_class = analyzer.classes["com.example.TestClass"]